@@ -1,10 +1,23 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
+from jinja2 import Template
 
 # --- Configuration ---
 API_URL = "http://127.0.0.1:8000/analyze"
+REQUEST_TIMEOUT = 60  # seconds
+
+# Compiled once at import; rendered per job card
+CARD_TPL = Template("""
+<div class="job-card">
+    <h3>{{ job.title }}</h3>
+    <p><strong>📍 Location:</strong> {{ job.location }}</p>
+    <p><span class="match-score">Match Score: {{ job.match_percentage }}%</span></p>
+    <p><strong>⚠️ Missing Skills:</strong> <span class="missing-skills">{{ job.details.missing_skills|join(', ') }}</span></p>
+</div>
+""", autoescape=True)
 
 st.set_page_config(
     page_title="AI Job Matcher",
@@ -13,6 +26,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Keep-alive session shared across Streamlit reruns, so repeat analyses reuse the connection."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 # --- Custom CSS ---
 st.markdown("""
 <style>
@@ -98,7 +120,7 @@ if uploaded_file is not None:
         with st.spinner("AI Agents are analyzing your profile..."):
             try:
                 files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-                response = requests.post(API_URL, files=files)
+                response = get_session().post(API_URL, files=files, timeout=REQUEST_TIMEOUT)
                 
                 if response.status_code == 200:
                     st.session_state.analysis_results = response.json()
@@ -129,14 +151,7 @@ if uploaded_file is not None:
             
             for job in top_jobs:
                 with st.container():
-                    st.markdown(f"""
-                    <div class="job-card">
-                        <h3>{job['title']}</h3>
-                        <p><strong>📍 Location:</strong> {job['location']}</p>
-                        <p><span class="match-score">Match Score: {job['match_percentage']}%</span></p>
-                        <p><strong>⚠️ Missing Skills:</strong> <span class="missing-skills">{', '.join(job['details']['missing_skills'])}</span></p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(CARD_TPL.render(job=job), unsafe_allow_html=True)
                     with st.expander("View Details"):
                         st.write(f"**Semantic Score:** {job['details']['semantic_score']}")
                         st.write(f"**Skill Match:** {job['details']['skill_match']}")